@@ -21,22 +21,14 @@ class DialogueWindow:
         Returns: (messages, anchor_id, anchor_chat_id)
         - messages: list of dicts, 2 before + anchor + 2 after
         """
-        msg = self.db.get_message_by_db_id(message_id)  # Returns dict
+        # Anchor + neighbours in a single DB session; all returned as dicts
+        msg, before_msgs, after_msgs = self.db.get_message_with_context(
+            message_id, before=2, after=2
+        )
         if not msg:
             return [], message_id, 0
 
-        ts = datetime.fromisoformat(msg["timestamp"]) if msg["timestamp"] else None
-        if not ts:
-            return [msg], msg["id"], msg["chat_id"]
-
-        before_msgs, after_msgs = self.db.get_messages_around(
-            chat_id=msg["chat_id"],
-            timestamp=ts,
-            before=2,
-            after=2,
-        )
-
-        window = before_msgs + [msg] + after_msgs  # All already dicts
+        window = before_msgs + [msg] + after_msgs
         return window, msg["id"], msg["chat_id"]
 
     def scroll_back(self, chat_id: int, first_timestamp_unix: int) -> list[dict]:
@@ -65,16 +57,8 @@ class DialogueWindow:
 
     def has_earlier(self, chat_id: int, first_timestamp_unix: int) -> bool:
         """Check if there are messages before the current window."""
-        ts = self._ts_from_unix(first_timestamp_unix)
-        earlier, _ = self.db.get_messages_around(
-            chat_id=chat_id, timestamp=ts, before=1, after=0
-        )
-        return len(earlier) > 0
+        return self.db.has_messages_before(chat_id, self._ts_from_unix(first_timestamp_unix))
 
     def has_later(self, chat_id: int, last_timestamp_unix: int) -> bool:
         """Check if there are messages after the current window."""
-        ts = self._ts_from_unix(last_timestamp_unix)
-        _, later = self.db.get_messages_around(
-            chat_id=chat_id, timestamp=ts, before=0, after=1
-        )
-        return len(later) > 0
+        return self.db.has_messages_after(chat_id, self._ts_from_unix(last_timestamp_unix))
@@ -1,39 +1,68 @@
 import re
 from datetime import datetime
+from functools import lru_cache
 
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup
 
 import config
 
+_MARKUP_START_RE = re.compile(r"[<&]")
+
+
+def _escape_html(text: str) -> str:
+    return (
+        text.replace("&", "&amp;")
+        .replace("<", "&lt;")
+        .replace(">", "&gt;")
+    )
+
+
+@lru_cache(maxsize=256)
+def _highlight_pattern(terms: tuple[str, ...]) -> re.Pattern | None:
+    """Compile all highlight terms into one case-insensitive alternation (longest first)."""
+    escaped = sorted({_escape_html(t) for t in terms if t}, key=len, reverse=True)
+    if not escaped:
+        return None
+    return re.compile("|".join(re.escape(t) for t in escaped), re.IGNORECASE)
+
+
+def _format_timestamp(ts_str: str) -> str:
+    """Format ISO timestamp to DD.MM.YYYY HH:MM."""
+    try:
+        dt = datetime.fromisoformat(ts_str)
+        return dt.strftime("%d.%m.%Y %H:%M")
+    except (ValueError, TypeError):
+        return "Unknown date"
+
 
 class Formatter:
     """Format search results and dialogue windows for Telegram."""
 
     NUMBER_EMOJIS = ["1\u20e3", "2\u20e3", "3\u20e3"]
+    # Static row shared by every dialogue keyboard (telegram buttons are immutable)
+    BACK_TO_RESULTS_ROW = (InlineKeyboardButton("\U0001f519 Back to results", callback_data="br"),)
 
     def escape_html(self, text: str) -> str:
         """Escape HTML special characters for Telegram HTML mode."""
-        return (
-            text.replace("&", "&amp;")
-            .replace("<", "&lt;")
-            .replace(">", "&gt;")
-        )
+        return _escape_html(text)
 
     def highlight(self, text: str, terms: list[str]) -> str:
         """Bold highlight terms in already-escaped HTML text (case-insensitive)."""
-        for term in sorted(terms, key=len, reverse=True):
-            escaped_term = self.escape_html(term)
-            pattern = re.compile(re.escape(escaped_term), re.IGNORECASE)
-            text = pattern.sub(lambda m: f"<b>{m.group()}</b>", text)
-        return text
+        pattern = _highlight_pattern(tuple(terms))
+        if pattern is None:
+            return text
+        return pattern.sub(lambda m: f"<b>{m.group()}</b>", text)
 
     def truncate_html(self, text: str, max_chars: int) -> str:
         """Truncate HTML-escaped text at max_chars of visible content, preserving tags."""
+        if len(text) <= max_chars:
+            return text  # Visible length can't exceed raw length — nothing to cut
         visible = 0
         result = []
         open_tags = []
         i = 0
-        while i < len(text):
+        n = len(text)
+        while i < n:
             if text[i] == "<":
                 # Track HTML tags (don't count towards visible chars)
                 end = text.find(">", i)
@@ -56,10 +85,13 @@ class Formatter:
                 visible += 1
                 i = end + 1
             else:
-                result.append(text[i])
-                visible += 1
-                i += 1
-            if visible >= max_chars and i < len(text):
+                # Copy the whole plain-text run up to the next tag/entity (or the budget) at once
+                special = _MARKUP_START_RE.search(text, i)
+                stop = min(special.start() if special else n, i + max(max_chars - visible, 1))
+                result.append(text[i:stop])
+                visible += stop - i
+                i = stop
+            if visible >= max_chars and i < n:
                 result.append("...")
                 break
         # Close any open tags
@@ -70,17 +102,22 @@ class Formatter:
 
     def _format_timestamp(self, ts_str: str) -> str:
         """Format ISO timestamp to DD.MM.YYYY HH:MM."""
-        try:
-            dt = datetime.fromisoformat(ts_str)
-            return dt.strftime("%d.%m.%Y %H:%M")
-        except (ValueError, TypeError):
-            return "Unknown date"
-
-    def _char_budget_per_message(self, msg_count: int) -> int:
-        """Calculate per-message character budget to stay within Telegram limit."""
+        return _format_timestamp(ts_str)
+
+    def annotate_dates(self, results: list[dict]) -> None:
+        """Precompute 'formatted_date' once per result so page flips don't re-derive it."""
+        for msg in results:
+            if not msg.get("formatted_date"):
+                msg["formatted_date"] = _format_timestamp(msg.get("timestamp", ""))
+
+    def _char_budget_per_message(self, msg_count: int, reserved: int = 0) -> int:
+        """Calculate per-message character budget to stay within Telegram limit.
+
+        `reserved` is visible text already committed elsewhere (e.g. the explanation header).
+        """
         overhead = 80  # header line
         per_msg_overhead = 50  # name + date line per message
-        available = config.MESSAGE_CHAR_LIMIT - overhead - (per_msg_overhead * msg_count)
+        available = config.MESSAGE_CHAR_LIMIT - overhead - reserved - (per_msg_overhead * msg_count)
         return max(available // max(msg_count, 1), 100)
 
     def format_search_results(
@@ -102,14 +139,18 @@ class Formatter:
         sort_label = "oldest first" if sort_order == "asc" else "newest first"
 
         lines = []
+        reserved = 0
         if explanation:
-            lines.append(f"{self.escape_html(explanation)}\n")
+            # Bound the LLM-written header so the page always fits in one message
+            limit = config.EXPLANATION_CHAR_LIMIT
+            lines.append(f"{self.truncate_html(self.escape_html(explanation), limit)}\n")
+            reserved = min(len(explanation), limit) + 4  # + "..." and newline
         lines.append(f"Found {total} messages. Showing {start}-{end} ({sort_label}):\n")
-        budget = self._char_budget_per_message(len(page_results))
+        budget = self._char_budget_per_message(len(page_results), reserved)
 
         for i, msg in enumerate(page_results):
             name = self.escape_html(msg.get("first_name") or msg.get("username") or "Unknown")
-            date = self._format_timestamp(msg.get("timestamp", ""))
+            date = msg.get("formatted_date") or self._format_timestamp(msg.get("timestamp", ""))
             text = msg.get("text") or ""
             text = self.escape_html(text)
             text = self.highlight(text, highlight_terms)
@@ -157,7 +198,7 @@ class Formatter:
         lines = []
         for msg in messages:
             name = self.escape_html(msg.get("first_name") or msg.get("username") or "Unknown")
-            date = self._format_timestamp(msg.get("timestamp", ""))
+            date = msg.get("formatted_date") or self._format_timestamp(msg.get("timestamp", ""))
             text = msg.get("text") or ""
 
             is_anchor = msg.get("id") == anchor_id
@@ -182,11 +223,9 @@ class Formatter:
             last_ts = messages[-1].get("timestamp_unix") or 0
             buttons_nav.append(InlineKeyboardButton("Forward \u27a1\ufe0f", callback_data=f"df:{last_ts}"))
 
-        buttons_back = [InlineKeyboardButton("\U0001f519 Back to results", callback_data="br")]
-
         keyboard_rows = []
         if buttons_nav:
             keyboard_rows.append(buttons_nav)
-        keyboard_rows.append(buttons_back)
+        keyboard_rows.append(self.BACK_TO_RESULTS_ROW)
 
         return "\n".join(lines).strip(), InlineKeyboardMarkup(keyboard_rows)
@@ -1,5 +1,6 @@
 import json
 import logging
+from datetime import datetime, timedelta, timezone
 
 import chromadb
 from chromadb.config import Settings
@@ -7,7 +8,12 @@ from openai import OpenAI
 
 import config
 from db.database import Database
-from .prompts import SYSTEM_PROMPT, TOOL_DEFINITIONS
+from .prompts import (
+    SYSTEM_PROMPT,
+    SYSTEM_PROMPT_DATE_FILTERS,
+    TOOL_DEFINITIONS,
+    TOOL_DEFINITIONS_DATE_FILTERS,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +33,9 @@ class AgentLoop:
             self.collection = chroma.get_collection("messages")
         except Exception as e:
             logger.warning(f"ChromaDB unavailable, SQL-only mode: {e}")
+        self.date_filters = self._has_date_metadata(self.collection)
+        if self.collection and not self.date_filters:
+            logger.warning("ChromaDB documents lack timestamp_unix metadata, vector_search date filters disabled")
 
     def process_query(self, user_message: str) -> dict:
         """
@@ -42,7 +51,7 @@ class AgentLoop:
             }
         """
         messages = [
-            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "system", "content": SYSTEM_PROMPT_DATE_FILTERS if self.date_filters else SYSTEM_PROMPT},
             {"role": "user", "content": user_message},
         ]
         collected_results: dict[int, dict] = {}  # id -> message dict
@@ -52,7 +61,7 @@ class AgentLoop:
                 response = self.openai.chat.completions.create(
                     model=config.CHAT_MODEL,
                     messages=messages,
-                    tools=TOOL_DEFINITIONS,
+                    tools=TOOL_DEFINITIONS_DATE_FILTERS if self.date_filters else TOOL_DEFINITIONS,
                     tool_choice="auto",
                 )
             except Exception as e:
@@ -108,6 +117,12 @@ class AgentLoop:
         query = args.get("query", "")
         n_results = min(args.get("n_results", config.AGENT_MAX_RESULTS), config.AGENT_MAX_RESULTS)
 
+        try:
+            start, end = self._date_bounds(args.get("date_from"), args.get("date_to"))
+        except (ValueError, TypeError):
+            return {"error": "Invalid date. Use YYYY-MM-DD for date_from/date_to."}
+        where = self._date_where(args.get("date_from"), args.get("date_to")) if self.date_filters else None
+
         try:
             # Embed query
             emb_response = self.openai.embeddings.create(
@@ -119,7 +134,8 @@ class AgentLoop:
             results = self.collection.query(
                 query_embeddings=[query_embedding],
                 n_results=n_results,
-                include=["documents", "metadatas", "distances"],
+                where=where,
+                include=["distances"],  # Full rows come from SQLite below
             )
         except Exception as e:
             logger.error(f"Vector search error: {e}")
@@ -128,24 +144,80 @@ class AgentLoop:
         if not results["ids"] or not results["ids"][0]:
             return []
 
-        # Map vector IDs to DB ids, fetch full messages
-        matches = []
-        for i, vec_id in enumerate(results["ids"][0]):
+        # Map vector IDs to DB ids, then fetch all hits in one query
+        similarities = {}
+        for vec_id, distance in zip(results["ids"][0], results["distances"][0]):
             try:
                 db_id = int(vec_id.split("_")[1])
             except (IndexError, ValueError):
                 continue
+            similarities.setdefault(db_id, round(1 - distance, 3))
 
-            similarity = round(1 - results["distances"][0][i], 3)
-            msg = self.db.get_message_by_db_id(db_id)  # Returns dict
+        msgs_by_id = {m["id"]: m for m in self.db.get_messages_by_db_ids(list(similarities))}
+
+        # Keep ChromaDB's ranking order
+        matches = []
+        for db_id, similarity in similarities.items():
+            msg = msgs_by_id.get(db_id)
             if not msg:
                 continue
+            # SQLite timestamps are authoritative; without Chroma date metadata this is the
+            # only date filter, so it narrows the top hits rather than searching the period
+            if (start is not None or end is not None) and not self._in_bounds(
+                msg.get("timestamp_unix"), start, end
+            ):
+                continue
 
             msg["similarity"] = similarity
             matches.append(msg)
 
         return matches
 
+    @staticmethod
+    def _has_date_metadata(collection) -> bool:
+        """Probe one document for integer timestamp_unix metadata; Chroma silently drops
+        documents without it from any where filter on that key."""
+        if collection is None:
+            return False
+        try:
+            sample = collection.get(limit=1, include=["metadatas"])
+        except Exception as e:
+            logger.warning(f"ChromaDB metadata probe failed: {e}")
+            return False
+        metadatas = sample.get("metadatas") or []
+        ts = (metadatas[0] or {}).get("timestamp_unix") if metadatas else None
+        return isinstance(ts, int) and not isinstance(ts, bool)
+
+    @staticmethod
+    def _date_bounds(date_from: str | None, date_to: str | None) -> tuple[int | None, int | None]:
+        """Parse YYYY-MM-DD dates into a [start, end) UTC epoch range (date_to is inclusive)."""
+        start = end = None
+        if date_from:
+            start = int(datetime.strptime(date_from, "%Y-%m-%d").replace(tzinfo=timezone.utc).timestamp())
+        if date_to:
+            end_dt = datetime.strptime(date_to, "%Y-%m-%d").replace(tzinfo=timezone.utc) + timedelta(days=1)
+            end = int(end_dt.timestamp())
+        return start, end
+
+    @staticmethod
+    def _in_bounds(ts: int | None, start: int | None, end: int | None) -> bool:
+        if ts is None:
+            return False
+        return (start is None or ts >= start) and (end is None or ts < end)
+
+    @classmethod
+    def _date_where(cls, date_from: str | None, date_to: str | None) -> dict | None:
+        """Build a ChromaDB metadata filter on timestamp_unix (date_to is inclusive)."""
+        start, end = cls._date_bounds(date_from, date_to)
+        conditions = []
+        if start is not None:
+            conditions.append({"timestamp_unix": {"$gte": start}})
+        if end is not None:
+            conditions.append({"timestamp_unix": {"$lt": end}})
+        if not conditions:
+            return None
+        return conditions[0] if len(conditions) == 1 else {"$and": conditions}
+
     def _exec_sql(self, args: dict) -> list[dict] | dict:
         sql = args.get("sql", "")
         try:
@@ -165,11 +237,17 @@ class AgentLoop:
         explanation = args.get("explanation", "")
 
         if result_ids:
-            # Use specified IDs
-            results = [collected[rid] for rid in result_ids if rid in collected]
+            # Use specified IDs (deduplicated, order kept) in a single pass
+            results = []
+            missing_ids = []
+            for rid in dict.fromkeys(result_ids):
+                msg = collected.get(rid)
+                if msg is not None:
+                    results.append(msg)
+                else:
+                    missing_ids.append(rid)
 
             # If some IDs weren't in collected (e.g., from SQL), fetch from DB
-            missing_ids = [rid for rid in result_ids if rid not in collected]
             if missing_ids:
                 db_msgs = self.db.get_messages_by_db_ids(missing_ids)
                 results.extend(db_msgs)
@@ -1,3 +1,5 @@
+import copy
+
 ENTITY_ALIASES = {
     # Politicians
     "Зеленський": ["зе", "зєля", "зелупа", "зеля", "зелібоба", "клоун", "зеленый", "бункерний хохол"],
@@ -48,14 +50,22 @@ def _format_members_for_prompt() -> str:
     return "\n".join(lines)
 
 
-SYSTEM_PROMPT = f"""You are a chat history search agent. Your job is to find messages in a chat history database.
+# Only advertised when the vector store carries timestamp_unix metadata (see AgentLoop)
+_DATE_FILTER_DOC = """
+   Optional date_from/date_to (YYYY-MM-DD, inclusive) restrict the search to a period."""
+
+
+def _system_prompt(date_filters: bool) -> str:
+    date_args = ", date_from, date_to" if date_filters else ""
+    date_doc = _DATE_FILTER_DOC if date_filters else ""
+    return f"""You are a chat history search agent. Your job is to find messages in a chat history database.
 
 You have three tools:
 
-1. vector_search(query, n_results) — semantic search in the vector database.
+1. vector_search(query, n_results{date_args}) — semantic search in the vector database.
    Returns messages similar in meaning to the query.
    Best for: fuzzy topics, phrases with unknown exact wording, morphology variations.
-   Results include a similarity score.
+   Results include a similarity score.{date_doc}
 
 2. run_sql(sql) — execute a read-only SQL query against the messages table.
    Table schema:
@@ -119,6 +129,10 @@ When searching for any of these terms, use multiple OR conditions in SQL to cove
 Example: searching for "порох" → WHERE text LIKE '%порох%' OR text LIKE '%порошенк%' OR text LIKE '%барига%' OR text LIKE '%рошен%'"""
 
 
+SYSTEM_PROMPT = _system_prompt(date_filters=False)
+SYSTEM_PROMPT_DATE_FILTERS = _system_prompt(date_filters=True)
+
+
 TOOL_DEFINITIONS = [
     {
         "type": "function",
@@ -192,3 +206,25 @@ TOOL_DEFINITIONS = [
         }
     }
 ]
+
+_DATE_FILTER_PARAMS = {
+    "date_from": {
+        "type": "string",
+        "description": "Only messages on or after this date (YYYY-MM-DD)"
+    },
+    "date_to": {
+        "type": "string",
+        "description": "Only messages on or before this date (YYYY-MM-DD)"
+    },
+}
+
+
+def _with_date_filters(tools: list[dict]) -> list[dict]:
+    tools = copy.deepcopy(tools)
+    for tool in tools:
+        if tool["function"]["name"] == "vector_search":
+            tool["function"]["parameters"]["properties"].update(_DATE_FILTER_PARAMS)
+    return tools
+
+
+TOOL_DEFINITIONS_DATE_FILTERS = _with_date_filters(TOOL_DEFINITIONS)
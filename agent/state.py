@@ -1,4 +1,5 @@
 import time
+from collections import OrderedDict
 from dataclasses import dataclass, field
 
 import config
@@ -31,29 +32,44 @@ class DialogueState:
 
 class StateManager:
     def __init__(self):
-        self._states: dict[tuple, SearchState | DialogueState] = {}
+        # Kept in access order (least recently used first), so eviction only inspects the front
+        self._states: OrderedDict[tuple, SearchState | DialogueState] = OrderedDict()
+
+    def _is_expired(self, state: SearchState | DialogueState, now: float) -> bool:
+        return now - state.last_accessed > STATE_TTL_MINUTES * 60
 
     def _evict_expired(self):
         now = time.time()
-        ttl = STATE_TTL_MINUTES * 60
-        expired = [k for k, v in self._states.items() if now - v.last_accessed > ttl]
-        for k in expired:
-            del self._states[k]
+        while self._states:
+            key, state = next(iter(self._states.items()))
+            if not self._is_expired(state, now):
+                break
+            del self._states[key]
 
     def _evict_lru(self):
         if len(self._states) >= STATE_MAX_CONCURRENT:
-            oldest = min(self._states, key=lambda k: self._states[k].last_accessed)
-            del self._states[oldest]
+            self._states.popitem(last=False)
 
     def set(self, chat_id: int, message_id: int, state: SearchState | DialogueState):
         self._evict_expired()
-        self._evict_lru()
-        self._states[(chat_id, message_id)] = state
+        key = (chat_id, message_id)
+        if key in self._states:
+            del self._states[key]
+        else:
+            self._evict_lru()
+        state.last_accessed = time.time()
+        self._states[key] = state
 
     def get(self, chat_id: int, message_id: int) -> SearchState | DialogueState | None:
         self._evict_expired()
         key = (chat_id, message_id)
         state = self._states.get(key)
-        if state:
-            state.last_accessed = time.time()
+        if state is None:
+            return None
+        now = time.time()
+        if self._is_expired(state, now):
+            del self._states[key]
+            return None
+        state.last_accessed = now
+        self._states.move_to_end(key)
         return state
@@ -1,6 +1,7 @@
 import asyncio
 import logging
 import re
+from functools import cache
 
 from telegram import Update
 from telegram.ext import (
@@ -21,6 +22,39 @@ from agent.dialogue import DialogueWindow
 
 logger = logging.getLogger(__name__)
 
+# Mentions that are clearly not search queries — answered without calling the agent
+_TRIVIAL_QUERIES = frozenset({
+    "hi", "hello", "hey", "thanks", "thank you", "thx", "ok",
+    "привіт", "дякую", "дяка", "ок",
+    "привет", "спасибо", "пасиб", "спс",
+})
+
+
+def _is_trivial_query(query: str) -> bool:
+    """True for greetings/thanks and text without any letters or digits."""
+    if not any(c.isalnum() for c in query):
+        return True
+    return query.casefold().strip(" .,!?)(") in _TRIVIAL_QUERIES
+
+
+@cache
+def _mention_re(username: str) -> re.Pattern:
+    """Compiled @mention pattern for the bot; the username is fixed for the process lifetime."""
+    return re.compile(f"@{re.escape(username)}", re.IGNORECASE)
+
+
+class _BotMentionFilter(filters.MessageFilter):
+    """Let through only messages that mention this bot, so other group chatter never reaches a handler."""
+
+    def __init__(self):
+        super().__init__(name="BotMention")
+
+    def filter(self, message) -> bool:
+        username = message.get_bot().username
+        if not username or not message.text:
+            return False
+        return _mention_re(username).search(message.text) is not None
+
 
 class BotHandlers:
     def __init__(self, db: Database, agent: AgentLoop):
@@ -67,16 +101,17 @@ class BotHandlers:
         # Extract query text
         query = message.text
 
-        # Strip bot mention in groups
+        # Strip bot mention in groups (_BotMentionFilter only dispatches messages that mention us)
         if message.chat.type != "private" and context.bot.username:
-            mention = f"@{context.bot.username}"
-            if mention.lower() not in query.lower():
-                return  # Not mentioned in group, ignore
-            query = re.sub(re.escape(mention), "", query, flags=re.IGNORECASE).strip()
+            query = _mention_re(context.bot.username).sub("", query).strip()
 
         if not query:
             return
 
+        if _is_trivial_query(query):
+            await message.reply_text("Ask me a question, e.g. who said X? Type /help for examples.")
+            return
+
         # Send "searching" indicator
         reply = await message.reply_text("\U0001f50d Searching...")
 
@@ -99,6 +134,7 @@ class BotHandlers:
             return
 
         # Store state
+        self.formatter.annotate_dates(result["results"])
         search_state = SearchState(
             all_results=result["results"],
             original_query=query,
@@ -126,19 +162,26 @@ class BotHandlers:
     async def handle_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Route inline button callbacks."""
         query = update.callback_query
-        await query.answer()
+        # Acknowledge in the background so the round-trip overlaps the actual work
+        answer_task = asyncio.create_task(query.answer())
         data = query.data
 
-        if data.startswith("p:"):
-            await self._handle_page(query, data)
-        elif data.startswith("d:"):
-            await self._handle_dialogue_open(query, data)
-        elif data.startswith("db:"):
-            await self._handle_dialogue_back(query, data)
-        elif data.startswith("df:"):
-            await self._handle_dialogue_forward(query, data)
-        elif data == "br":
-            await self._handle_back_to_results(query)
+        try:
+            if data.startswith("p:"):
+                await self._handle_page(query, data)
+            elif data.startswith("d:"):
+                await self._handle_dialogue_open(query, data)
+            elif data.startswith("db:"):
+                await self._handle_dialogue_back(query, data)
+            elif data.startswith("df:"):
+                await self._handle_dialogue_forward(query, data)
+            elif data == "br":
+                await self._handle_back_to_results(query)
+        finally:
+            # A failed ack (e.g. "query is too old") is only logged so it never masks a handler error
+            (answered,) = await asyncio.gather(answer_task, return_exceptions=True)
+            if isinstance(answered, BaseException):
+                logger.warning(f"Failed to answer callback query: {answered}")
 
     async def _handle_page(self, query, data: str):
         """Navigate search result pages."""
@@ -184,12 +227,14 @@ class BotHandlers:
             await query.message.edit_text("Message not found.")
             return
 
-        # Check navigation availability
-        has_earlier = await asyncio.to_thread(
-            self.dialogue.has_earlier, anchor_chat_id, window[0].get("timestamp_unix", 0)
-        )
-        has_later = await asyncio.to_thread(
-            self.dialogue.has_later, anchor_chat_id, window[-1].get("timestamp_unix", 0)
+        # Check navigation availability (independent lookups, run concurrently)
+        has_earlier, has_later = await asyncio.gather(
+            asyncio.to_thread(
+                self.dialogue.has_earlier, anchor_chat_id, window[0].get("timestamp_unix", 0)
+            ),
+            asyncio.to_thread(
+                self.dialogue.has_later, anchor_chat_id, window[-1].get("timestamp_unix", 0)
+            ),
         )
 
         # Store dialogue state with embedded search state for "back to results"
@@ -332,6 +377,6 @@ def setup_handlers(app: Application, db: Database, agent: AgentLoop):
 
     # Group: messages mentioning the bot
     app.add_handler(MessageHandler(
-        filters.TEXT & filters.ChatType.GROUPS & ~filters.COMMAND,
+        filters.TEXT & filters.ChatType.GROUPS & ~filters.COMMAND & _BotMentionFilter(),
         handlers.handle_message,
     ))
@@ -16,6 +16,10 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
 # Database
 SQLITE_DB_PATH = Path(os.getenv("SQLITE_DB_PATH", DATA_DIR / "metadata.db"))
 CHROMA_DB_PATH = Path(os.getenv("CHROMA_DB_PATH", DATA_DIR / "chroma"))
+# Collection "messages": document ids are "msg_<messages.id>". vector_search only
+# offers date_from/date_to when documents carry integer "timestamp_unix" metadata
+# (UTC epoch seconds, same as messages.timestamp_unix); Chroma's where filter skips
+# any document without it, so the indexer must write it for every document.
 
 # Models
 CHAT_MODEL = "gpt-5-mini"
@@ -31,6 +35,7 @@ RESULTS_PER_PAGE = 3
 DIALOGUE_INITIAL_WINDOW = 5    # 2 before + selected + 2 after
 DIALOGUE_SCROLL_SIZE = 3
 MESSAGE_CHAR_LIMIT = 4096
+EXPLANATION_CHAR_LIMIT = 1000  # Cap for the agent's explanation header
 
 # State
 STATE_TTL_MINUTES = 30
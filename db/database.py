@@ -1,17 +1,57 @@
 import re
+import threading
 from datetime import datetime
 from pathlib import Path
 from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
 
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, event, or_, select
 from sqlalchemy.orm import sessionmaker, Session
 
 import config
-from .models import Base, Message
-
-
-def _msg_to_dict(msg: Message) -> dict:
-    """Convert a Message ORM object to a plain dict (avoids detached session issues)."""
+from .models import Base, Message, format_display_name, format_message_date
+
+_BLOCK_COMMENT_RE = re.compile(r"/\*.*?\*/", re.DOTALL)
+_LINE_COMMENT_RE = re.compile(r"--.*$", re.MULTILINE)
+_ALLOWED_SQL_VERBS = frozenset({"SELECT", "WITH"})
+_IN_CHUNK_SIZE = 900  # Stay under SQLITE_MAX_VARIABLE_NUMBER (999 on older builds)
+# Indexes replaced by a composite one in models.py; dropped so writers stop maintaining them
+_SUPERSEDED_INDEXES = (
+    "idx_messages_chat_id",  # -> idx_messages_chat_timestamp
+    "idx_messages_user_id",  # -> idx_messages_user_timestamp
+)
+
+
+def _set_sqlite_pragmas(dbapi_conn, _connection_record):
+    """Per-connection tuning: WAL lets reads run during re-indexing, the rest trades fsyncs for RAM."""
+    cursor = dbapi_conn.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA mmap_size=268435456")  # 256 MB
+    cursor.execute("PRAGMA cache_size=-65536")    # 64 MB
+    cursor.close()
+
+
+# Columns read by _msg_to_dict; selecting them as plain rows skips ORM hydration
+_MESSAGE_COLUMNS = (
+    Message.id,
+    Message.message_id,
+    Message.chat_id,
+    Message.user_id,
+    Message.username,
+    Message.first_name,
+    Message.last_name,
+    Message.text,
+    Message.timestamp,
+    Message.timestamp_unix,
+    Message.reply_to_message_id,
+    Message.is_forwarded,
+    Message.forward_from,
+)
+
+
+def _msg_to_dict(msg) -> dict:
+    """Convert a row selected with _MESSAGE_COLUMNS to a plain dict."""
     return {
         "id": msg.id,
         "message_id": msg.message_id,
@@ -26,8 +66,8 @@ def _msg_to_dict(msg: Message) -> dict:
         "reply_to_message_id": msg.reply_to_message_id,
         "is_forwarded": msg.is_forwarded,
         "forward_from": msg.forward_from,
-        "display_name": msg.display_name,
-        "formatted_date": msg.formatted_date,
+        "display_name": format_display_name(msg.first_name, msg.username, msg.user_id),
+        "formatted_date": format_message_date(msg.timestamp),
     }
 
 
@@ -38,23 +78,30 @@ class Database:
         self.db_path = db_path
         db_path.parent.mkdir(parents=True, exist_ok=True)
         self.engine = create_engine(f"sqlite:///{db_path}", echo=False)
+        event.listen(self.engine, "connect", _set_sqlite_pragmas)
         Base.metadata.create_all(self.engine)
+        # create_all skips tables that already exist, so add any index declared since
+        for index in Message.__table__.indexes:
+            index.create(self.engine, checkfirst=True)
+        with self.engine.begin() as conn:
+            for name in _SUPERSEDED_INDEXES:
+                conn.exec_driver_sql(f"DROP INDEX IF EXISTS {name}")
         self.SessionLocal = sessionmaker(bind=self.engine)
+        # Shared by all execute_safe_sql calls instead of spawning a pool per query
+        self._sql_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="safe-sql")
 
     def get_session(self) -> Session:
         return self.SessionLocal()
 
-    def get_message_by_db_id(self, db_id: int) -> dict | None:
-        """Get a single message by its internal DB id. Returns a plain dict."""
-        with self.get_session() as session:
-            msg = session.query(Message).filter(Message.id == db_id).first()
-            return _msg_to_dict(msg) if msg else None
-
     def get_messages_by_db_ids(self, db_ids: list[int]) -> list[dict]:
         """Get multiple messages by DB ids. Returns plain dicts."""
+        results = []
         with self.get_session() as session:
-            msgs = session.query(Message).filter(Message.id.in_(db_ids)).all()
-            return [_msg_to_dict(m) for m in msgs]
+            for i in range(0, len(db_ids), _IN_CHUNK_SIZE):
+                chunk = db_ids[i : i + _IN_CHUNK_SIZE]
+                msgs = session.execute(select(*_MESSAGE_COLUMNS).where(Message.id.in_(chunk)))
+                results.extend(_msg_to_dict(m) for m in msgs)
+        return results
 
     def get_messages_around(
         self,
@@ -65,49 +112,114 @@ class Database:
     ) -> tuple[list[dict], list[dict]]:
         """Get messages before and after a timestamp within the same chat. Returns plain dicts."""
         with self.get_session() as session:
-            before_msgs = (
-                session.query(Message)
-                .filter(Message.chat_id == chat_id, Message.timestamp < timestamp)
-                .order_by(Message.timestamp.desc())
-                .limit(before)
-                .all()
-            )
-            after_msgs = (
-                session.query(Message)
-                .filter(Message.chat_id == chat_id, Message.timestamp > timestamp)
-                .order_by(Message.timestamp.asc())
-                .limit(after)
-                .all()
-            )
-            return (
-                [_msg_to_dict(m) for m in reversed(before_msgs)],
-                [_msg_to_dict(m) for m in after_msgs],
+            return self._query_around(session, chat_id, timestamp, before, after)
+
+    def get_message_with_context(
+        self,
+        db_id: int,
+        before: int = 2,
+        after: int = 2,
+    ) -> tuple[dict | None, list[dict], list[dict]]:
+        """Get a message and its neighbours in one session. Returns (message, before, after) as plain dicts."""
+        with self.get_session() as session:
+            msg = session.execute(select(*_MESSAGE_COLUMNS).where(Message.id == db_id)).first()
+            if not msg:
+                return None, [], []
+            if not msg.timestamp:
+                return _msg_to_dict(msg), [], []
+            before_msgs, after_msgs = self._query_around(
+                session, msg.chat_id, msg.timestamp, before, after
             )
+            return _msg_to_dict(msg), before_msgs, after_msgs
+
+    def has_messages_before(self, chat_id: int, timestamp: datetime) -> bool:
+        """Check whether the chat has any message earlier than timestamp (id-only LIMIT 1 probe)."""
+        with self.get_session() as session:
+            stmt = select(Message.id).where(Message.chat_id == chat_id, Message.timestamp < timestamp)
+            return session.execute(stmt.limit(1)).first() is not None
+
+    def has_messages_after(self, chat_id: int, timestamp: datetime) -> bool:
+        """Check whether the chat has any message later than timestamp (id-only LIMIT 1 probe)."""
+        with self.get_session() as session:
+            stmt = select(Message.id).where(Message.chat_id == chat_id, Message.timestamp > timestamp)
+            return session.execute(stmt.limit(1)).first() is not None
+
+    def _query_around(
+        self,
+        session: Session,
+        chat_id: int,
+        timestamp: datetime,
+        before: int,
+        after: int,
+    ) -> tuple[list[dict], list[dict]]:
+        # Both neighbour seeks run as subqueries of one statement (one round-trip)
+        before_ids = (
+            select(Message.id)
+            .where(Message.chat_id == chat_id, Message.timestamp < timestamp)
+            .order_by(Message.timestamp.desc())
+            .limit(before)
+        )
+        after_ids = (
+            select(Message.id)
+            .where(Message.chat_id == chat_id, Message.timestamp > timestamp)
+            .order_by(Message.timestamp.asc())
+            .limit(after)
+        )
+        msgs = session.execute(
+            select(*_MESSAGE_COLUMNS)
+            .where(or_(Message.id.in_(before_ids), Message.id.in_(after_ids)))
+            .order_by(Message.timestamp.asc())
+        ).all()
+        return (
+            [_msg_to_dict(m) for m in msgs if m.timestamp < timestamp],
+            [_msg_to_dict(m) for m in msgs if m.timestamp > timestamp],
+        )
 
     def execute_safe_sql(self, sql: str) -> list[dict]:
         """Execute a read-only SQL query with timeout. Only SELECT/WITH allowed."""
         # Strip comments and trailing semicolons
-        cleaned = re.sub(r"/\*.*?\*/", "", sql, flags=re.DOTALL)
-        cleaned = re.sub(r"--.*$", "", cleaned, flags=re.MULTILINE)
+        cleaned = _BLOCK_COMMENT_RE.sub("", sql)
+        cleaned = _LINE_COMMENT_RE.sub("", cleaned)
         cleaned = cleaned.strip().rstrip(";").strip()
         first_word = cleaned.split()[0].upper() if cleaned else ""
 
-        if first_word not in ("SELECT", "WITH"):
+        if first_word not in _ALLOWED_SQL_VERBS:
             raise ValueError("Only SELECT queries are allowed")
 
-        # Wrap cleaned SQL to enforce result limit
-        wrapped = f"SELECT * FROM ({cleaned}) LIMIT {config.AGENT_MAX_RESULTS}"
+        # Wrap cleaned SQL to enforce result limit; the limit is bound so the
+        # statement text depends only on the query, and the driver-level call skips
+        # text()'s ":name" bind parsing, which misreads literals like ' :00'
+        wrapped = f"SELECT * FROM ({cleaned}) LIMIT ?"
+
+        # Handle to the DBAPI connection while the statement runs. It is cleared before
+        # the connection goes back to the pool, so a late timeout never interrupts
+        # another caller's query on the same pooled connection.
+        running = {}
+        lock = threading.Lock()
 
         def _run():
             with self.engine.connect() as conn:
-                result = conn.execute(text(wrapped))
-                columns = list(result.keys())
-                return [dict(zip(columns, row)) for row in result.fetchall()]
-
-        # Execute with timeout
-        with ThreadPoolExecutor(max_workers=1) as pool:
-            future = pool.submit(_run)
-            try:
-                return future.result(timeout=config.AGENT_QUERY_TIMEOUT)
-            except FuturesTimeoutError:
-                raise TimeoutError("Query took too long. Try a more specific search.")
+                with lock:
+                    if running.get("timed_out"):
+                        raise TimeoutError("Query took too long. Try a more specific search.")
+                    running["dbapi"] = conn.connection.dbapi_connection
+                try:
+                    result = conn.exec_driver_sql(wrapped, (config.AGENT_MAX_RESULTS,))
+                    columns = list(result.keys())
+                    return [dict(zip(columns, row)) for row in result.fetchall()]
+                finally:
+                    with lock:
+                        running.pop("dbapi", None)
+
+        # Execute with timeout; on expiry abort the statement so the worker is freed
+        future = self._sql_executor.submit(_run)
+        try:
+            return future.result(timeout=config.AGENT_QUERY_TIMEOUT)
+        except FuturesTimeoutError:
+            future.cancel()
+            with lock:
+                running["timed_out"] = True
+                dbapi = running.get("dbapi")
+                if dbapi is not None:
+                    dbapi.interrupt()
+            raise TimeoutError("Query took too long. Try a more specific search.")
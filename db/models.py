@@ -6,6 +6,20 @@ from sqlalchemy import (
 from sqlalchemy.orm import DeclarativeBase
 
 
+def format_display_name(first_name: str | None, username: str | None, user_id: int | None) -> str:
+    if first_name:
+        return first_name
+    if username:
+        return f"@{username}"
+    return f"User {user_id}"
+
+
+def format_message_date(timestamp: datetime | None) -> str:
+    if timestamp:
+        return timestamp.strftime("%d.%m.%Y %H:%M")
+    return "Unknown date"
+
+
 class Base(DeclarativeBase):
     pass
 
@@ -38,23 +52,21 @@ class Message(Base):
 
     __table_args__ = (
         UniqueConstraint("message_id", "chat_id", name="uq_message_chat"),
-        Index("idx_messages_user_id", "user_id"),
+        # Per-user date ranges from agent SQL (user_id = ? AND timestamp BETWEEN ...);
+        # also serves plain user_id lookups as its leftmost prefix
+        Index("idx_messages_user_timestamp", "user_id", "timestamp"),
         Index("idx_messages_timestamp", "timestamp"),
         Index("idx_messages_message_id", "message_id"),
-        Index("idx_messages_chat_id", "chat_id"),
+        # Dialogue window seeks (chat_id = ? AND timestamp </> ? ORDER BY timestamp LIMIT n);
+        # also serves plain chat_id lookups as its leftmost prefix
+        Index("idx_messages_chat_timestamp", "chat_id", "timestamp"),
         Index("idx_messages_reply_to", "reply_to_message_id"),
     )
 
     @property
     def display_name(self) -> str:
-        if self.first_name:
-            return self.first_name
-        if self.username:
-            return f"@{self.username}"
-        return f"User {self.user_id}"
+        return format_display_name(self.first_name, self.username, self.user_id)
 
     @property
     def formatted_date(self) -> str:
-        if self.timestamp:
-            return self.timestamp.strftime("%d.%m.%Y %H:%M")
-        return "Unknown date"
+        return format_message_date(self.timestamp)
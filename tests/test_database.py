@@ -0,0 +1,94 @@
+import pytest
+from datetime import datetime, timedelta
+from db.database import Database
+from db.models import Message
+
+BASE_TS = datetime(2021, 3, 15, 12, 0)
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = Database(tmp_path / "test.db")
+    with database.get_session() as session:
+        for i in range(10):
+            ts = BASE_TS + timedelta(minutes=i)
+            session.add(Message(
+                id=i + 1,
+                message_id=1000 + i,
+                chat_id=100,
+                user_id=1,
+                first_name="Леха",
+                text=f"message {i}",
+                timestamp=ts,
+                timestamp_unix=int(ts.timestamp()),
+            ))
+        # Same timestamps in another chat must never leak into the window
+        session.add(Message(
+            id=50, message_id=1000, chat_id=200, user_id=2, first_name="Саша",
+            text="other chat", timestamp=BASE_TS + timedelta(minutes=4),
+        ))
+        session.commit()
+    return database
+
+
+def test_get_messages_around(db):
+    before, after = db.get_messages_around(100, BASE_TS + timedelta(minutes=5), before=2, after=3)
+    assert [m["id"] for m in before] == [4, 5]
+    assert [m["id"] for m in after] == [7, 8, 9]
+
+
+def test_get_message_with_context(db):
+    msg, before, after = db.get_message_with_context(5, before=2, after=2)
+    assert msg["id"] == 5
+    assert msg["formatted_date"] == "15.03.2021 12:04"
+    assert [m["id"] for m in before] == [3, 4]
+    assert [m["id"] for m in after] == [6, 7]
+
+
+def test_get_message_with_context_missing(db):
+    assert db.get_message_with_context(999) == (None, [], [])
+
+
+def test_has_messages_before_after(db):
+    assert db.has_messages_before(100, BASE_TS + timedelta(minutes=1))
+    assert not db.has_messages_before(100, BASE_TS)
+    assert db.has_messages_after(100, BASE_TS + timedelta(minutes=8))
+    assert not db.has_messages_after(100, BASE_TS + timedelta(minutes=9))
+    assert not db.has_messages_after(200, BASE_TS + timedelta(minutes=4))
+
+
+def test_sqlite_pragmas_applied(db):
+    with db.engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+        assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == 1  # NORMAL
+        assert conn.exec_driver_sql("PRAGMA temp_store").scalar() == 2  # MEMORY
+
+
+def test_get_messages_by_db_ids_chunked(db):
+    ids = list(range(1, 2001))  # Well past a single IN-clause chunk
+    result = db.get_messages_by_db_ids(ids)
+    assert sorted(m["id"] for m in result) == list(range(1, 11)) + [50]
+    assert db.get_messages_by_db_ids([]) == []
+
+
+def test_missing_indexes_added_to_existing_db(tmp_path):
+    path = tmp_path / "old.db"
+    Database(path).engine.dispose()
+    with Database(path).engine.begin() as conn:
+        conn.exec_driver_sql("DROP INDEX idx_messages_chat_timestamp")
+    reopened = Database(path)
+    with reopened.engine.connect() as conn:
+        names = {row[1] for row in conn.exec_driver_sql("PRAGMA index_list(messages)")}
+    assert {"idx_messages_chat_timestamp", "idx_messages_user_timestamp"} <= names
+
+
+def test_superseded_indexes_dropped(tmp_path):
+    path = tmp_path / "old.db"
+    with Database(path).engine.begin() as conn:
+        conn.exec_driver_sql("CREATE INDEX idx_messages_chat_id ON messages (chat_id)")
+        conn.exec_driver_sql("CREATE INDEX idx_messages_user_id ON messages (user_id)")
+    reopened = Database(path)
+    with reopened.engine.connect() as conn:
+        names = {row[1] for row in conn.exec_driver_sql("PRAGMA index_list(messages)")}
+    assert not {"idx_messages_chat_id", "idx_messages_user_id"} & names
+    assert {"idx_messages_chat_timestamp", "idx_messages_user_timestamp"} <= names
@@ -1,4 +1,6 @@
+import re
 import pytest
+import config
 from agent.formatter import Formatter
 
 
@@ -24,6 +26,19 @@ def test_highlight_multiple_terms():
     assert "<b>гамма</b>" in result
 
 
+def test_highlight_overlapping_terms_not_nested():
+    f = Formatter()
+    escaped = f.escape_html("альфа бета гамма")
+    result = f.highlight(escaped, ["бета", "альфа бета"])
+    assert result == "<b>альфа бета</b> гамма"
+
+
+def test_highlight_ignores_empty_terms():
+    f = Formatter()
+    assert f.highlight("текст", ["", "екс"]) == "т<b>екс</b>т"
+    assert f.highlight("текст", []) == "текст"
+
+
 def test_truncate_html_short():
     f = Formatter()
     result = f.truncate_html("Short text", 100)
@@ -71,3 +86,53 @@ def test_format_search_results_page():
     assert "Леха" in text
     assert "Саша" in text
     assert "1-3" in text
+
+
+def test_format_timestamp():
+    f = Formatter()
+    assert f._format_timestamp("2021-03-15T14:32:00") == "15.03.2021 14:32"
+    assert f._format_timestamp("2021-03-15 14:32:00.000000") == "15.03.2021 14:32"
+    assert f._format_timestamp("2021-03-15") == "15.03.2021 00:00"
+    assert f._format_timestamp("") == "Unknown date"
+    assert f._format_timestamp(None) == "Unknown date"
+    assert f._format_timestamp("abcd-ef-ghTij:kl") == "Unknown date"
+
+
+def test_annotate_dates():
+    f = Formatter()
+    results = [
+        {"id": 1, "timestamp": "2021-03-15T14:32:00"},
+        {"id": 2, "timestamp": "2021-03-15T14:33:00", "formatted_date": "15.03.2021 14:33"},
+        {"id": 3, "text": "no timestamp"},
+    ]
+    f.annotate_dates(results)
+    assert results[0]["formatted_date"] == "15.03.2021 14:32"
+    assert results[1]["formatted_date"] == "15.03.2021 14:33"
+    assert results[2]["formatted_date"] == "Unknown date"
+
+
+def test_format_dialogue_window_keyboard():
+    f = Formatter()
+    messages = [
+        {"id": 1, "first_name": "Леха", "text": "перше", "timestamp": "2021-03-15T14:32:00", "timestamp_unix": 100},
+        {"id": 2, "first_name": "Саша", "text": "друге", "timestamp": "2021-03-15T14:33:00", "timestamp_unix": 160},
+    ]
+    text, keyboard = f.format_dialogue_window(messages, anchor_id=2, highlight_terms=[], has_earlier=True, has_later=False)
+    assert "\U0001f449 <b>Саша</b>" in text
+    rows = keyboard.inline_keyboard
+    assert [b.callback_data for b in rows[0]] == ["db:100"]
+    assert [b.callback_data for b in rows[-1]] == ["br"]
+
+
+def test_format_search_results_fits_message_limit():
+    f = Formatter()
+    results = [
+        {"id": i, "first_name": "Леха", "text": "слово " * 1000, "timestamp": "2021-03-15T14:32:00"}
+        for i in range(3)
+    ]
+    text, _ = f.format_search_results(
+        results, total=3, page=0, highlight_terms=["слово"], sort_order="asc",
+        explanation="пояснення " * 1000,
+    )
+    visible = re.sub(r"<[^>]+>", "", text)
+    assert len(visible) <= config.MESSAGE_CHAR_LIMIT
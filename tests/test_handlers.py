@@ -0,0 +1,55 @@
+import asyncio
+import pytest
+from types import SimpleNamespace
+from bot.handlers import BotHandlers, _BotMentionFilter, _is_trivial_query
+
+
+@pytest.mark.parametrize("query", ["???", "...", "!!! )", "Дякую!", "thank you", "Привіт", "ok."])
+def test_trivial_query(query):
+    assert _is_trivial_query(query)
+
+
+@pytest.mark.parametrize("query", ["біткоін", "хто сказав дякую?", "2023", "thanks for what?"])
+def test_real_query_not_trivial(query):
+    assert not _is_trivial_query(query)
+
+
+def _group_message(text, username="history_bot"):
+    bot = SimpleNamespace(username=username)
+    return SimpleNamespace(text=text, get_bot=lambda: bot)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("@history_bot хто сказав X?", True),
+    ("хто сказав X, @History_Bot?", True),
+    ("просто балачки в групі", False),
+    ("@other_bot хто сказав X?", False),
+    ("", False),
+    (None, False),
+])
+def test_bot_mention_filter(text, expected):
+    assert _BotMentionFilter().filter(_group_message(text)) is expected
+
+
+def test_bot_mention_filter_without_username():
+    assert _BotMentionFilter().filter(_group_message("@history_bot hi", username=None)) is False
+
+
+def _callback_update(data, answer_error=None):
+    async def answer():
+        if answer_error:
+            raise answer_error
+    return SimpleNamespace(callback_query=SimpleNamespace(data=data, answer=answer))
+
+
+def test_callback_answer_failure_does_not_mask_handler_error():
+    handlers = BotHandlers(db=None, agent=None)
+    update = _callback_update("p:not-a-page", answer_error=RuntimeError("query is too old"))
+    with pytest.raises(ValueError):
+        asyncio.run(handlers.handle_callback(update, None))
+
+
+def test_callback_answer_failure_is_not_raised():
+    handlers = BotHandlers(db=None, agent=None)
+    update = _callback_update("unknown", answer_error=RuntimeError("query is too old"))
+    asyncio.run(handlers.handle_callback(update, None))
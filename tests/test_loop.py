@@ -0,0 +1,113 @@
+import pytest
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from agent.loop import AgentLoop
+from db.database import Database
+from db.models import Message
+
+
+def _utc(*args) -> int:
+    return int(datetime(*args, tzinfo=timezone.utc).timestamp())
+
+
+@pytest.fixture
+def loop(tmp_path):
+    db = Database(tmp_path / "test.db")
+    with db.get_session() as session:
+        for i, day in enumerate((10, 15, 20), start=1):
+            ts = datetime(2021, 3, day, 12, 0)
+            session.add(Message(
+                id=i, message_id=i, chat_id=100, user_id=1, text=f"message {i}",
+                timestamp=ts, timestamp_unix=_utc(2021, 3, day, 12, 0),
+            ))
+        session.commit()
+    with patch("agent.loop.OpenAI"), patch("agent.loop.chromadb"):
+        agent = AgentLoop(db)
+    agent.openai.embeddings.create.return_value = SimpleNamespace(
+        data=[SimpleNamespace(embedding=[0.0])]
+    )
+    return agent
+
+
+def test_date_where_single_bound():
+    assert AgentLoop._date_where("2021-03-15", None) == {"timestamp_unix": {"$gte": _utc(2021, 3, 15)}}
+    assert AgentLoop._date_where(None, "2021-03-15") == {"timestamp_unix": {"$lt": _utc(2021, 3, 16)}}
+    assert AgentLoop._date_where(None, None) is None
+
+
+def test_date_where_both_bounds_inclusive_end():
+    assert AgentLoop._date_where("2021-03-01", "2021-03-31") == {"$and": [
+        {"timestamp_unix": {"$gte": _utc(2021, 3, 1)}},
+        {"timestamp_unix": {"$lt": _utc(2021, 4, 1)}},  # Whole of March 31st included
+    ]}
+
+
+@pytest.mark.parametrize("date_from", ["2021/03/15", "15.03.2021", "2021-13-01", 20210315])
+def test_date_where_rejects_bad_input(date_from):
+    with pytest.raises((ValueError, TypeError)):
+        AgentLoop._date_where(date_from, None)
+
+
+def test_vector_search_bad_date_returns_error(loop):
+    loop.collection = SimpleNamespace(query=lambda **kwargs: pytest.fail("should not query"))
+    assert "error" in loop._exec_vector_search({"query": "x", "date_from": "yesterday"})
+
+
+def test_vector_search_keeps_rank_order(loop):
+    loop.collection = SimpleNamespace(query=lambda **kwargs: {
+        "ids": [["msg_3", "msg_99", "bad", "msg_1", "msg_3"]],
+        "distances": [[0.1, 0.2, 0.3, 0.4, 0.5]],
+    })
+    result = loop._exec_vector_search({"query": "x"})
+    assert [(m["id"], m["similarity"]) for m in result] == [(3, 0.9), (1, 0.6)]
+
+
+def _recording_collection(calls):
+    def query(**kwargs):
+        calls.append(kwargs.get("where"))
+        return {"ids": [["msg_1", "msg_2", "msg_3"]], "distances": [[0.1, 0.2, 0.3]]}
+    return SimpleNamespace(query=query)
+
+
+def test_vector_search_pushes_date_filter_when_metadata_present(loop):
+    calls = []
+    loop.collection, loop.date_filters = _recording_collection(calls), True
+    result = loop._exec_vector_search({"query": "x", "date_from": "2021-03-14", "date_to": "2021-03-16"})
+    assert calls == [AgentLoop._date_where("2021-03-14", "2021-03-16")]
+    assert [m["id"] for m in result] == [2]
+
+
+def test_vector_search_filters_sqlite_rows_without_metadata(loop):
+    calls = []
+    loop.collection, loop.date_filters = _recording_collection(calls), False
+    result = loop._exec_vector_search({"query": "x", "date_from": "2021-03-14", "date_to": "2021-03-16"})
+    assert calls == [None]  # Single unfiltered query, no retry
+    assert [m["id"] for m in result] == [2]
+
+
+@pytest.mark.parametrize("metadatas, expected", [
+    ([{"timestamp_unix": 1615809600}], True),
+    ([{"timestamp_unix": "1615809600"}], False),
+    ([{}], False),
+    ([None], False),
+    ([], False),
+])
+def test_has_date_metadata(metadatas, expected):
+    collection = SimpleNamespace(get=lambda **kwargs: {"ids": ["msg_1"], "metadatas": metadatas})
+    assert AgentLoop._has_date_metadata(collection) is expected
+    assert AgentLoop._has_date_metadata(None) is False
+
+
+def test_date_args_only_advertised_with_metadata(loop):
+    loop.openai.chat.completions.create.return_value = SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(tool_calls=None, content="hi"))]
+    )
+    for date_filters in (False, True):
+        loop.date_filters = date_filters
+        loop.process_query("x")
+        kwargs = loop.openai.chat.completions.create.call_args.kwargs
+        vector_search = next(t for t in kwargs["tools"] if t["function"]["name"] == "vector_search")
+        assert ("date_from" in vector_search["function"]["parameters"]["properties"]) is date_filters
+        assert ("date_from" in kwargs["messages"][0]["content"]) is date_filters
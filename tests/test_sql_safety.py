@@ -1,5 +1,9 @@
 import pytest
 import tempfile
+import threading
+import time
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from unittest.mock import patch
 from pathlib import Path
 from db.database import Database
 
@@ -15,6 +19,11 @@ def test_select_allowed(db):
     assert result[0]["val"] == 1
 
 
+def test_colon_in_string_literal_is_not_a_bind(db):
+    result = db.execute_safe_sql("SELECT ' :00' AS val")
+    assert result[0]["val"] == " :00"
+
+
 def test_insert_rejected(db):
     with pytest.raises(ValueError, match="Only SELECT"):
         db.execute_safe_sql("INSERT INTO messages VALUES (1)")
@@ -69,3 +78,57 @@ def test_semicolon_stripped(db):
 def test_trailing_semicolon_stripped(db):
     result = db.execute_safe_sql("SELECT 1 AS val ;  ")
     assert result[0]["val"] == 1
+
+
+def test_timeout_interrupts_query(db):
+    slow = (
+        "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c WHERE x < 100000000) "
+        "SELECT count(*) AS n FROM c"
+    )
+    start = time.time()
+    with patch("config.AGENT_QUERY_TIMEOUT", 0.2):
+        with pytest.raises(TimeoutError, match="too long"):
+            db.execute_safe_sql(slow)
+    assert time.time() - start < 2
+    # Worker is free again for the next query
+    assert db.execute_safe_sql("SELECT 1 AS val")[0]["val"] == 1
+
+
+def test_late_timeout_does_not_interrupt_pooled_connection(db):
+    """Statement finishes just as the wait expires; its connection is already back in the pool."""
+    slow = (
+        "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c WHERE x < 1000000) "
+        "SELECT count(*) AS n FROM c"
+    )
+    other = {}
+
+    def _other_caller():
+        try:
+            with db.engine.connect() as conn:
+                other["n"] = conn.exec_driver_sql(slow).scalar()
+        except Exception as e:
+            other["error"] = e
+
+    class _DeadlineFuture:
+        def __init__(self, fn):
+            fn()  # The query completes and returns its connection to the pool...
+
+        def result(self, timeout=None):
+            # ...another caller picks that connection up before the timeout fires
+            thread.start()
+            time.sleep(0.05)
+            raise FuturesTimeoutError
+
+        def cancel(self):
+            return False
+
+    thread = threading.Thread(target=_other_caller)
+    with patch.object(db, "_sql_executor") as executor:
+        executor.submit.side_effect = _DeadlineFuture
+        with pytest.raises(TimeoutError, match="too long"):
+            db.execute_safe_sql("SELECT 1 AS val")
+    thread.join()
+
+    assert "error" not in other
+    assert other["n"] == 1000000
+    assert db.execute_safe_sql("SELECT 1 AS val")[0]["val"] == 1
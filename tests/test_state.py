@@ -56,3 +56,29 @@ def test_get_updates_last_accessed():
 
     sm.get(100, 200)
     assert state.last_accessed > old_time
+
+
+def test_get_refreshes_lru_order():
+    with patch("agent.state.STATE_MAX_CONCURRENT", 2):
+        sm = StateManager()
+        sm.set(1, 1, SearchState(all_results=[], original_query="q1"))
+        sm.set(2, 2, SearchState(all_results=[], original_query="q2"))
+
+        # Touching (1,1) makes (2,2) the least recently used
+        sm.get(1, 1)
+        sm.set(3, 3, SearchState(all_results=[], original_query="q3"))
+
+        assert sm.get(2, 2) is None
+        assert sm.get(1, 1) is not None
+        assert sm.get(3, 3) is not None
+
+
+def test_set_existing_key_does_not_evict():
+    with patch("agent.state.STATE_MAX_CONCURRENT", 2):
+        sm = StateManager()
+        sm.set(1, 1, SearchState(all_results=[], original_query="q1"))
+        sm.set(2, 2, SearchState(all_results=[], original_query="q2"))
+        sm.set(2, 2, DialogueState(anchor_message_id=5, anchor_chat_id=1, current_window=[]))
+
+        assert sm.get(1, 1) is not None
+        assert isinstance(sm.get(2, 2), DialogueState)